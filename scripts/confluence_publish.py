@@ -4,12 +4,99 @@
 # Purpose: Publish RTM HTML report to Confluence (create or update page)
 # ==========================================================
 
+import base64
+import hashlib
 import json
+import mimetypes
 import os
 import sys
-from urllib.parse import quote
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import quote, urljoin
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import AuthBase
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # orjson is optional – fall back to stdlib json
+    orjson = None
+
+# Shared session: keep-alive + connection pooling across all Confluence calls
+SESSION = requests.Session()
+SESSION.headers.update({"Accept": "application/json"})
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,  # de-synchronise retries from concurrent Jenkins jobs
+        status_forcelist=[408, 425, 429, 500, 502, 503, 504],
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    ),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+# Gzip-compressed page bodies go through a pool without status retries: a rejection
+# (400/415/5xx, often from a proxy) is answered by resending uncompressed, not by replaying
+GZIP_SESSION = requests.Session()
+GZIP_SESSION.headers.update(SESSION.headers)
+_gzip_adapter = HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=2,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(),
+        allowed_methods=frozenset(["POST", "PUT"]),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    ),
+)
+GZIP_SESSION.mount("http://", _gzip_adapter)
+GZIP_SESSION.mount("https://", _gzip_adapter)
+
+# (connect, read): fail fast on an unreachable host, keep the read budget for uploads
+REQUEST_TIMEOUT = (10, 30)
+
+
+@dataclass(frozen=True)
+class Endpoints:
+    """Confluence REST URLs, derived once from the normalized base URL."""
+
+    content: str
+
+    @classmethod
+    def from_base_url(cls, base_url: str) -> "Endpoints":
+        return cls(content=f"{base_url.rstrip('/')}/rest/api/content")
+
+    def page(self, page_id) -> str:
+        return f"{self.content}/{page_id}"
+
+    def attachments(self, page_id) -> str:
+        return f"{self.content}/{page_id}/child/attachment"
+
+    def properties(self, page_id) -> str:
+        return f"{self.content}/{page_id}/property"
+
+
+class BasicAuthHeader(AuthBase):
+    """HTTP Basic auth whose header value is encoded once, not on every request."""
+
+    def __init__(self, user, token):
+        self.value = "Basic " + base64.b64encode(f"{user}:{token}".encode("utf-8")).decode("ascii")
+
+    def __call__(self, r):
+        r.headers["Authorization"] = self.value
+        return r
 
 
 def env(name, default=None, required=False):
@@ -20,23 +107,124 @@ def env(name, default=None, required=False):
     return value
 
 
-def load_html(path):
+def check_html(path):
     if not os.path.exists(path):
         print(f"[ERROR] HTML report not found: {path}", file=sys.stderr)
         sys.exit(4)
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+    return path
+
+
+class StorageBody:
+    """
+    JSON request body whose body.storage.value is streamed from the HTML report
+    in 64 KB chunks instead of being read into memory and re-encoded as a whole.
+    Iterating again re-opens the file, so urllib3 can replay it on a retry.
+    With gzip=True the stream is compressed on the fly (level 1).
+    """
+
+    _PLACEHOLDER = "\x00RTM_HTML_REPORT\x00"
+
+    def __init__(self, payload: dict, html_path: str, gzip: bool = False, chunk_size: int = 64 * 1024):
+        payload["body"]["storage"]["value"] = self._PLACEHOLDER
+        encoded = json.dumps(payload, ensure_ascii=False)
+        self.head, self.tail = encoded.split(json.dumps(self._PLACEHOLDER)[1:-1])
+        self.html_path = html_path
+        self.gzip = gzip
+        self.chunk_size = chunk_size
+
+    def _iter_json(self):
+        yield self.head.encode("utf-8")
+        with open(self.html_path, "r", encoding="utf-8") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield json.dumps(chunk, ensure_ascii=False)[1:-1].encode("utf-8")
+        yield self.tail.encode("utf-8")
+
+    def __iter__(self):
+        if not self.gzip:
+            yield from self._iter_json()
+            return
+        compressor = zlib.compressobj(1, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+        for chunk in self._iter_json():
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
 
 
-def get_existing_page_id(base_url, space_key, title, auth, verify_ssl):
-    url = f"{base_url}/rest/api/content?spaceKey={quote(space_key)}&title={quote(title)}&expand=version"
-    resp = requests.get(url, auth=auth, verify=verify_ssl)
+def safe_request(method, url, discard_body=False, session=SESSION, **kwargs):
+    """
+    Issue a request on the shared session; retries are handled by the pool adapter.
+    With discard_body=True a successful response body is drained undecoded (so the
+    connection goes back to the pool) and never parsed; error bodies stay readable.
+    """
+    try:
+        resp = session.request(method, url, timeout=REQUEST_TIMEOUT, stream=discard_body, **kwargs)
+        if discard_body and 200 <= resp.status_code < 300:
+            resp.raw.read(decode_content=False)
+        return resp
+    except requests.exceptions.RequestException as e:
+        print(f"[ERROR] Network/connection error while calling Confluence API: {e}", file=sys.stderr)
+        sys.exit(5)
+
+
+def json_body(resp):
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return json.loads(resp.content)
+
+
+def load_page_cache(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_page_cache(path, cache):
+    Path(os.path.dirname(path) or ".").mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+
+
+def find_page(api, space_key, title, cache, verify_ssl):
+    """
+    Resolve the page via the on-disk cache first, falling back to the title search.
+    The cached ETag makes the direct lookup conditional: 304 means the cached
+    id/version are still current and no body is transferred.
+    """
+    cached = cache.get(space_key, {}).get(title)
+    if cached and cached.get("id"):
+        headers = {"If-None-Match": cached["etag"]} if cached.get("etag") else {}
+        resp = safe_request("GET", f"{api.page(cached['id'])}?expand=version", headers=headers, verify=verify_ssl)
+        if resp.status_code == 304:
+            print(f"[INFO] Cached page id {cached['id']} unchanged since last run (ETag match)")
+            return cached["id"], cached.get("version")
+        if resp.status_code == 200:
+            page = json_body(resp)
+            if page.get("title") == title:
+                print(f"[INFO] Using cached page id {page.get('id')}")
+                cached.update(version=page.get("version", {}).get("number"), etag=resp.headers.get("ETag"))
+                return page.get("id"), cached["version"]
+        elif resp.status_code != 404:
+            print(f"[WARN] Failed to look up cached Confluence page {cached['id']} (HTTP {resp.status_code})")
+        print(f"[INFO] Cached page id {cached['id']} no longer matches – searching by title.")
+    return get_existing_page_id(api, space_key, title, verify_ssl)
+
+
+def get_existing_page_id(api, space_key, title, verify_ssl):
+    url = f"{api.content}?spaceKey={quote(space_key)}&title={quote(title)}&expand=version"
+    resp = safe_request("GET", url, verify=verify_ssl)
     if resp.status_code != 200:
         print(f"[WARN] Failed to search for existing Confluence page (HTTP {resp.status_code})")
         return None, None
 
-    data = resp.json()
-    results = data.get("results", [])
+    results = json_body(resp).get("results", [])
     if not results:
         return None, None
 
@@ -44,15 +232,42 @@ def get_existing_page_id(base_url, space_key, title, auth, verify_ssl):
     return page.get("id"), page.get("version", {}).get("number")
 
 
-def create_page(base_url, space_key, title, parent_id, html, auth, verify_ssl):
-    url = f"{base_url}/rest/api/content"
+def send_storage(method, url, payload, html_path, verify_ssl, discard_body=False, gzip_body=False):
+    """Send a page body, optionally gzip-compressed; a rejected gzip body is resent uncompressed."""
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+    if gzip_body:
+        resp = safe_request(
+            method,
+            url,
+            session=GZIP_SESSION,
+            data=StorageBody(payload, html_path, gzip=True),
+            headers={**headers, "Content-Encoding": "gzip"},
+            verify=verify_ssl,
+            discard_body=discard_body,
+        )
+        if resp.status_code not in (400, 415) and resp.status_code < 500:
+            return resp
+        print(f"[WARN] Confluence rejected gzip request body (HTTP {resp.status_code}) – resending uncompressed.")
+        resp.close()  # a streamed response holds its pooled connection until closed
+    return safe_request(
+        method,
+        url,
+        data=StorageBody(payload, html_path),
+        headers=headers,
+        verify=verify_ssl,
+        discard_body=discard_body,
+    )
+
+
+def create_page(api, space_key, title, parent_id, html_path, verify_ssl, gzip_body=False):
+    url = api.content
     payload = {
         "type": "page",
         "title": title,
         "space": {"key": space_key},
         "body": {
             "storage": {
-                "value": html,
+                "value": None,
                 "representation": "storage",
             }
         },
@@ -60,24 +275,18 @@ def create_page(base_url, space_key, title, parent_id, html, auth, verify_ssl):
     if parent_id:
         payload["ancestors"] = [{"id": parent_id}]
 
-    resp = requests.post(
-        url,
-        auth=auth,
-        json=payload,
-        headers={"Content-Type": "application/json"},
-        verify=verify_ssl,
-    )
+    resp = send_storage("POST", url, payload, html_path, verify_ssl, gzip_body=gzip_body)
     if not (200 <= resp.status_code < 300):
         print(f"[ERROR] Failed to create Confluence page (HTTP {resp.status_code}): {resp.text}", file=sys.stderr)
         sys.exit(5)
 
-    data = resp.json()
+    data = json_body(resp)
     print(f"[INFO] Created Confluence page: {data.get('id')}")
-    return data.get("id")
+    return data.get("id"), 1, resp.headers.get("ETag")
 
 
-def update_page(base_url, page_id, current_version, title, html, auth, verify_ssl):
-    url = f"{base_url}/rest/api/content/{page_id}"
+def update_page(api, page_id, current_version, title, html_path, verify_ssl, gzip_body=False):
+    url = api.page(page_id)
     new_version = (current_version or 0) + 1
     payload = {
         "id": page_id,
@@ -86,39 +295,255 @@ def update_page(base_url, page_id, current_version, title, html, auth, verify_ss
         "version": {"number": new_version},
         "body": {
             "storage": {
-                "value": html,
+                "value": None,
                 "representation": "storage",
             }
         },
     }
-    resp = requests.put(
-        url,
-        auth=auth,
-        json=payload,
-        headers={"Content-Type": "application/json"},
-        verify=verify_ssl,
-    )
+    resp = send_storage("PUT", url, payload, html_path, verify_ssl, discard_body=True, gzip_body=gzip_body)
     if not (200 <= resp.status_code < 300):
         print(f"[ERROR] Failed to update Confluence page (HTTP {resp.status_code}): {resp.text}", file=sys.stderr)
         sys.exit(5)
 
-    data = resp.json()
-    print(f"[INFO] Updated Confluence page: {data.get('id')} (version {new_version})")
-    return data.get("id")
+    print(f"[INFO] Updated Confluence page: {page_id} (version {new_version})")
+    return page_id, new_version, resp.headers.get("ETag")
+
+
+def list_attachments(api, page_id, verify_ssl):
+    """
+    Every attachment on the page. The listing is paginated, so _links.next is followed:
+    a report file missed on a later page would be re-POSTed as a duplicate. A failed
+    lookup is fatal for the same reason.
+    """
+    found = []
+    url = f"{api.attachments(page_id)}?limit=200"
+    while True:
+        resp = safe_request("GET", url, verify=verify_ssl)
+        if resp.status_code != 200:
+            print(f"[ERROR] Failed to list Confluence attachments (HTTP {resp.status_code}): {resp.text}", file=sys.stderr)
+            sys.exit(5)
+        body = json_body(resp)
+        found.extend(body.get("results", []))
+        links = body.get("_links", {})
+        if not links.get("next"):
+            break
+        url = f"{links['base']}{links['next']}" if links.get("base") else urljoin(url, links["next"])
+    return found
+
+
+def _content_type(file_name):
+    return mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+
+
+class MultipartBody:
+    """
+    File-like multipart/form-data body that reads the attachment files from disk as
+    the socket consumes it, instead of requests' files= encoder loading every file
+    into memory first. tell()/seek() let urllib3 rewind it when a request is retried.
+    """
+
+    def __init__(self, fields: dict, file_paths: list, file_field: str = "file"):
+        boundary = os.urandom(16).hex()
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._segments = []  # bytes, or a file path streamed from disk
+        for name, value in fields.items():
+            self._segments.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+            )
+        for path in file_paths:
+            file_name = os.path.basename(path).replace('"', "%22")
+            self._segments.append(
+                (
+                    f"--{boundary}\r\n"
+                    f'Content-Disposition: form-data; name="{file_field}"; filename="{file_name}"\r\n'
+                    f"Content-Type: {_content_type(file_name)}\r\n\r\n"
+                ).encode("utf-8")
+            )
+            self._segments.append(path)
+            self._segments.append(b"\r\n")
+        self._segments.append(f"--{boundary}--\r\n".encode("utf-8"))
+
+        self._sizes = [len(seg) if isinstance(seg, bytes) else os.path.getsize(seg) for seg in self._segments]
+        self._fh = None
+        self.seek(0)
+
+    def __len__(self):
+        return sum(self._sizes)
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=0):
+        if whence != 0:
+            raise OSError("MultipartBody only supports absolute seeks")
+        self.close()
+        self._pos = pos
+        self._index, self._offset = 0, pos
+        while self._index < len(self._sizes) and self._offset >= self._sizes[self._index]:
+            self._offset -= self._sizes[self._index]
+            self._index += 1
+        return pos
+
+    def read(self, size=-1):
+        out = []
+        remaining = len(self) - self._pos if size is None or size < 0 else size
+        while remaining > 0 and self._index < len(self._segments):
+            seg = self._segments[self._index]
+            if isinstance(seg, bytes):
+                data = seg[self._offset:self._offset + remaining]
+            else:
+                if self._fh is None:
+                    self._fh = open(seg, "rb")
+                    self._fh.seek(self._offset)
+                data = self._fh.read(remaining)
+            if not data:  # end of this segment – move on to the next one
+                self.close()
+                self._index, self._offset = self._index + 1, 0
+                continue
+            out.append(data)
+            self._offset += len(data)
+            self._pos += len(data)
+            remaining -= len(data)
+        return b"".join(out)
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def post_attachments(url, file_paths, verify_ssl):
+    """POST one or more files as 'file' parts of a single streamed multipart request."""
+    body = MultipartBody({"minorEdit": "true"}, file_paths)
+    try:
+        resp = safe_request(
+            "POST",
+            url,
+            data=body,
+            headers={"X-Atlassian-Token": "no-check", "Content-Type": body.content_type},
+            verify=verify_ssl,
+            discard_body=True,
+        )
+    finally:
+        body.close()
+
+    names = ", ".join(os.path.basename(p) for p in file_paths)
+    if not (200 <= resp.status_code < 300):
+        print(f"[ERROR] Failed to upload attachment(s) {names} (HTTP {resp.status_code}): {resp.text}", file=sys.stderr)
+        sys.exit(5)
+    return names
+
+
+def upload_attachments(api, page_id, file_paths, existing_attachments, executor, verify_ssl):
+    """
+    New files go up together in one multipart POST; files that already exist on the
+    page need their own .../{attachmentId}/data call, and those run in parallel.
+    """
+    url = api.attachments(page_id)
+    by_title = {a.get("title"): a for a in existing_attachments}
+    new_files, jobs = [], []
+    for path in file_paths:
+        if not path or not os.path.exists(path):
+            print(f"[WARN] Attachment missing or path not found: {path}")
+            continue
+        file_name = os.path.basename(path)
+        existing = by_title.get(file_name)
+        if existing:
+            jobs.append(executor.submit(post_attachments, f"{url}/{existing.get('id')}/data", [path], verify_ssl))
+        else:
+            new_files.append(path)
+
+    if new_files:
+        print(f"[INFO] Uploaded attachment(s): {post_attachments(url, new_files, verify_ssl)}")
+    for job in jobs:
+        print(f"[INFO] Updated attachment: {job.result()}")
+
+
+REPORT_HASH_PROPERTY = "rtm-report-hash"
+
+
+def report_fingerprint(json_path, html_path, attachment_paths):
+    """
+    sha256 of the RTM export the report was rendered from, plus which attachments exist.
+    The rendered files embed generation timestamps (the PDF's compressed size even varies
+    with them), so their bytes would never match between runs and are only hashed when the
+    export is not available. Recording presence makes a previously missing attachment
+    (e.g. a skipped PDF) change the fingerprint so it gets uploaded.
+    """
+    digest = hashlib.sha256()
+    if json_path and os.path.exists(json_path):
+        with open(json_path, "rb") as f:
+            data = orjson.loads(f.read()) if orjson is not None else json.load(f)
+        # Verbatim API payloads: large, and never part of the published page
+        for key in ("fetchedAt", "raw"):
+            data.pop(key, None)
+        for tc in data.get("testCases") or data.get("issues") or ():
+            if isinstance(tc, dict):
+                tc.pop("raw", None)
+        if orjson is not None:
+            digest.update(orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS))
+        else:
+            digest.update(json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    else:
+        with open(html_path, "rb") as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b""):
+                digest.update(chunk)
+    for path in attachment_paths:
+        present = bool(path) and os.path.exists(path)
+        digest.update(f"\0{os.path.basename(path or '')}:{int(present)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_report_hash(api, page_id, verify_ssl):
+    """Return (stored fingerprint, property version) or (None, None)."""
+    url = f"{api.properties(page_id)}/{REPORT_HASH_PROPERTY}"
+    resp = safe_request("GET", url, verify=verify_ssl)
+    if resp.status_code != 200:
+        return None, None
+    prop = json_body(resp)
+    return (prop.get("value") or {}).get("sha256"), prop.get("version", {}).get("number")
+
+
+def set_report_hash(api, page_id, fingerprint, property_version, verify_ssl):
+    value = {"sha256": fingerprint}
+    if property_version:
+        resp = safe_request(
+            "PUT",
+            f"{api.properties(page_id)}/{REPORT_HASH_PROPERTY}",
+            json={"key": REPORT_HASH_PROPERTY, "value": value, "version": {"number": property_version + 1}},
+            verify=verify_ssl,
+            discard_body=True,
+        )
+    else:
+        resp = safe_request(
+            "POST",
+            api.properties(page_id),
+            json={"key": REPORT_HASH_PROPERTY, "value": value},
+            verify=verify_ssl,
+            discard_body=True,
+        )
+    if not (200 <= resp.status_code < 300):
+        print(f"[WARN] Failed to store report hash on page {page_id} (HTTP {resp.status_code})")
 
 
 def main():
     base_url = env("CONFLUENCE_BASE_URL", required=True).rstrip("/")
+    api = Endpoints.from_base_url(base_url)
     user = env("CONFLUENCE_USER", required=True)
     token = env("CONFLUENCE_TOKEN", required=True)
     space = env("CONFLUENCE_SPACE", required=True)
     title = env("CONFLUENCE_TITLE", "RTM Test Execution Report")
     parent_id = env("CONFLUENCE_PARENT_ID", "")
     html_path = env("RTM_REPORT_HTML") or "report/rtm_execution.html"
+    pdf_path = env("RTM_REPORT_PDF") or "report/rtm_execution.pdf"
     verify_ssl = os.getenv("CONFLUENCE_VERIFY_SSL", "true").lower() not in ("false", "0", "no")
+    cache_path = env("CONFLUENCE_CACHE_FILE") or "report/.confluence_cache.json"
+    json_path = env("RTM_OUTPUT_JSON") or "data/rtm_execution.json"
+    force_update = os.getenv("CONFLUENCE_FORCE_UPDATE", "false").lower() in ("true", "1", "yes")
+    gzip_body = os.getenv("CONFLUENCE_GZIP", "false").lower() in ("true", "1", "yes")
 
-    auth = (user, token)
-    html = load_html(html_path)
+    SESSION.auth = GZIP_SESSION.auth = BasicAuthHeader(user, token)
+    check_html(html_path)
 
     print("=======================================================")
     print("[INFO] Publishing report to Confluence")
@@ -127,14 +552,39 @@ def main():
     print(f"[INFO]  Title    : {title}")
     print("=======================================================")
 
-    page_id, current_version = get_existing_page_id(base_url, space, title, auth, verify_ssl)
+    cache = load_page_cache(cache_path)
+    page_id, current_version = find_page(api, space, title, cache, verify_ssl)
 
-    if page_id:
-        print(f"[INFO] Existing page found: {page_id} (version={current_version}) – updating.")
-        update_page(base_url, page_id, current_version, title, html, auth, verify_ssl)
-    else:
-        print("[INFO] No existing page found – creating new page.")
-        create_page(base_url, space, title, parent_id, html, auth, verify_ssl)
+    attachment_paths = [html_path, pdf_path]
+    fingerprint = report_fingerprint(json_path, html_path, attachment_paths)
+    stored_hash, hash_version = get_report_hash(api, page_id, verify_ssl) if page_id else (None, None)
+    if stored_hash == fingerprint and not force_update:
+        print(f"[INFO] Page {page_id} already shows this report (sha256 {fingerprint[:12]}) – skipping update.")
+        save_page_cache(cache_path, cache)  # keep the refreshed ETag
+        print("[INFO] Confluence publish completed.")
+        sys.exit(0)
+
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        if page_id:
+            print(f"[INFO] Existing page found: {page_id} (version={current_version}) – updating.")
+            # The attachment listing does not depend on the page update – overlap them
+            listing = ex.submit(list_attachments, api, page_id, verify_ssl)
+            page_id, version, etag = update_page(api, page_id, current_version, title, html_path, verify_ssl, gzip_body)
+            existing = listing.result()
+        else:
+            print("[INFO] No existing page found – creating new page.")
+            page_id, version, etag = create_page(api, space, title, parent_id, html_path, verify_ssl, gzip_body)
+            existing = []  # a freshly created page has no attachments yet
+
+        entry = cache.setdefault(space, {}).setdefault(title, {})
+        entry.update(id=page_id, version=version)
+        if etag:  # the write's ETag makes the next run's lookup conditional again
+            entry["etag"] = etag
+        save_page_cache(cache_path, cache)
+
+        upload_attachments(api, page_id, attachment_paths, existing, ex, verify_ssl)
+
+    set_report_hash(api, page_id, fingerprint, hash_version, verify_ssl)
 
     print("[INFO] Confluence publish completed.")
     sys.exit(0)
@@ -3,14 +3,59 @@
 # 📘 fetch_rtm_data.py  (RTM Cloud V2 API)
 # Purpose: Fetch Test Execution results from RTM Cloud REST API
 # Endpoint: GET /api/v2/test-execution/{testKey}
+#          RTM_EXECUTION_KEYS=A,B,C fetches several executions
+#          concurrently, one JSON file per key
 # ==========================================================
 
+import base64
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import AuthBase
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # orjson is optional – fall back to stdlib json
+    orjson = None
+
+# Shared session: keep-alive + connection pooling for RTM API calls
+SESSION = requests.Session()
+SESSION.headers.update({"Accept": "application/json"})
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,  # de-synchronise retries from concurrent Jenkins jobs
+        status_forcelist=[408, 425, 429, 500, 502, 503, 504],
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    ),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+# (connect, read): fail fast on an unreachable host, but give large executions time to serialise
+REQUEST_TIMEOUT = (10, 120)
+
+
+class BasicAuthHeader(AuthBase):
+    """HTTP Basic auth whose header value is encoded once, not on every request."""
+
+    def __init__(self, user, token):
+        self.value = "Basic " + base64.b64encode(f"{user}:{token}".encode("utf-8")).decode("ascii")
+
+    def __call__(self, r):
+        r.headers["Authorization"] = self.value
+        return r
 
 
 def env(name, default=None, required=False):
@@ -21,6 +66,21 @@ def env(name, default=None, required=False):
     return value
 
 
+def parse_json(content: bytes):
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def write_json(data, path: str):
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
 def normalize_status(raw_status):
     """Support dict or plain string status."""
     if isinstance(raw_status, dict):
@@ -30,6 +90,26 @@ def normalize_status(raw_status):
     return str(raw_status)
 
 
+# Field aliases used by RTM-like APIs, in priority order
+KEY_ALIASES = ("key", "testCaseKey", "testCaseId", "id")
+NAME_ALIASES = ("summary", "name", "title")
+EXECUTED_BY_ALIASES = ("executedBy", "assignee", "tester")
+EXECUTED_ON_ALIASES = ("executedOn", "executionDate", "updated")
+DEFECTS_ALIASES = ("defects", "bugs")
+COMMENT_ALIASES = ("comment", "comments")
+SUMMARY_ALIASES = ("summary", "name", "description")
+
+
+def pick(item: dict, keys, default=None):
+    """First truthy value among keys – same result as chaining item.get(k) with `or`."""
+    value = None
+    for key in keys:
+        value = item.get(key)
+        if value:
+            return value
+    return value if default is None else default
+
+
 def extract_test_cases(raw: dict):
     """
     Try to find test case executions array in various fields commonly used by RTM-like APIs.
@@ -53,29 +133,17 @@ def extract_test_cases(raw: dict):
             break
 
     normalized = []
+    append = normalized.append
     for item in tces:
-        status = item.get("status")
-        status_name = normalize_status(status)
-
-        normalized.append(
+        append(
             {
-                "key": item.get("key")
-                or item.get("testCaseKey")
-                or item.get("testCaseId")
-                or item.get("id"),
-                "name": item.get("summary")
-                or item.get("name")
-                or item.get("title")
-                or "",
-                "status": status_name,
-                "executedBy": item.get("executedBy")
-                or item.get("assignee")
-                or item.get("tester"),
-                "executedOn": item.get("executedOn")
-                or item.get("executionDate")
-                or item.get("updated"),
-                "defects": item.get("defects") or item.get("bugs") or [],
-                "comment": item.get("comment") or item.get("comments") or "",
+                "key": pick(item, KEY_ALIASES),
+                "name": pick(item, NAME_ALIASES, ""),
+                "status": normalize_status(item.get("status")),
+                "executedBy": pick(item, EXECUTED_BY_ALIASES),
+                "executedOn": pick(item, EXECUTED_ON_ALIASES),
+                "defects": pick(item, DEFECTS_ALIASES, []),
+                "comment": pick(item, COMMENT_ALIASES, ""),
                 "raw": item,
             }
         )
@@ -83,64 +151,47 @@ def extract_test_cases(raw: dict):
     return normalized
 
 
-def main():
-    base_url = env("RTM_BASE_URL", required=True).rstrip("/")
-    project_key = env("RTM_PROJECT_KEY", required=True)
-    execution_key = (
-        env("RTM_EXECUTION_KEY")
-        or env("JIRA_EXECUTION_ID")
-        or env("TEST_EXECUTION_KEY")
-    )
-    if not execution_key:
-        print("[ERROR] Missing RTM_EXECUTION_KEY / JIRA_EXECUTION_ID / TEST_EXECUTION_KEY", file=sys.stderr)
-        sys.exit(2)
+def parse_keys(raw: str):
+    if not raw:
+        return []
+    parts = [p.strip() for p in raw.replace(";", ",").split(",")]
+    return list(dict.fromkeys(p for p in parts if p))
 
-    user = env("RTM_USER") or env("JIRA_USER", required=True)
-    token = env("RTM_TOKEN") or env("JIRA_TOKEN", required=True)
 
-    output_file = env("RTM_OUTPUT_JSON", "data/rtm_execution.json")
-    verify_ssl = env("RTM_VERIFY_SSL", "true").lower() not in ("false", "0", "no")
+def output_path_for(output_file: str, execution_key: str, multiple: bool) -> str:
+    if not multiple:
+        return output_file
+    stem, ext = os.path.splitext(output_file)
+    return f"{stem}_{execution_key}{ext or '.json'}"
 
-    url = f"{base_url}/api/v2/test-execution/{execution_key}"
 
-    print("==========================================================")
-    print(f"[INFO] RTM V2 API – Fetching Test Execution")
-    print(f"[INFO]  Base URL     : {base_url}")
-    print(f"[INFO]  Project Key  : {project_key}")
-    print(f"[INFO]  Execution Key: {execution_key}")
-    print(f"[INFO]  Endpoint     : {url}")
-    print("==========================================================")
+def fetch_execution(base_url: str, project_key: str, execution_key: str, verify_ssl: bool) -> dict:
+    url = f"{base_url}/api/v2/test-execution/{execution_key}"
 
     try:
-        resp = requests.get(
-            url,
-            headers={"Accept": "application/json"},
-            auth=(user, token),
-            timeout=30,
-            verify=verify_ssl,
-        )
+        resp = SESSION.get(url, timeout=REQUEST_TIMEOUT, verify=verify_ssl)
     except requests.exceptions.RequestException as e:
-        print(f"[ERROR] Network/connection error while calling RTM API: {e}", file=sys.stderr)
+        print(f"[ERROR] Network/connection error while calling RTM API for {execution_key}: {e}", file=sys.stderr)
         sys.exit(3)
 
     if not (200 <= resp.status_code < 300):
         print(
-            f"[ERROR] RTM API responded with HTTP {resp.status_code}:\n{resp.text}",
+            f"[ERROR] RTM API responded with HTTP {resp.status_code} for {execution_key}:\n{resp.text}",
             file=sys.stderr,
         )
         sys.exit(3)
 
     try:
-        raw = resp.json()
+        raw = parse_json(resp.content)
     except ValueError as e:
-        print(f"[ERROR] Failed to decode RTM API JSON: {e}", file=sys.stderr)
+        print(f"[ERROR] Failed to decode RTM API JSON for {execution_key}: {e}", file=sys.stderr)
         sys.exit(3)
 
     test_cases = extract_test_cases(raw)
     overall_status = normalize_status(raw.get("status"))
-    summary = raw.get("summary") or raw.get("name") or raw.get("description") or ""
+    summary = pick(raw, SUMMARY_ALIASES, "")
 
-    data_to_save = {
+    return {
         "fetchedAt": datetime.utcnow().isoformat(timespec="seconds") + "Z",
         "projectKey": project_key,
         "executionKey": execution_key,
@@ -150,12 +201,53 @@ def main():
         "raw": raw,
     }
 
+
+def main():
+    base_url = env("RTM_BASE_URL", required=True).rstrip("/")
+    project_key = env("RTM_PROJECT_KEY", required=True)
+    execution_keys = parse_keys(
+        env("RTM_EXECUTION_KEYS")
+        or env("RTM_EXECUTION_KEY")
+        or env("JIRA_EXECUTION_ID")
+        or env("TEST_EXECUTION_KEY")
+    )
+    if not execution_keys:
+        print("[ERROR] Missing RTM_EXECUTION_KEY(S) / JIRA_EXECUTION_ID / TEST_EXECUTION_KEY", file=sys.stderr)
+        sys.exit(2)
+
+    user = env("RTM_USER") or env("JIRA_USER", required=True)
+    token = env("RTM_TOKEN") or env("JIRA_TOKEN", required=True)
+
+    output_file = env("RTM_OUTPUT_JSON", "data/rtm_execution.json")
+    verify_ssl = env("RTM_VERIFY_SSL", "true").lower() not in ("false", "0", "no")
+    multiple = len(execution_keys) > 1
+
+    print("==========================================================")
+    print(f"[INFO] RTM V2 API – Fetching Test Execution")
+    print(f"[INFO]  Base URL     : {base_url}")
+    print(f"[INFO]  Project Key  : {project_key}")
+    print(f"[INFO]  Execution Key: {', '.join(execution_keys)}")
+    print(f"[INFO]  Endpoint     : {base_url}/api/v2/test-execution/{'{key}' if multiple else execution_keys[0]}")
+    print("==========================================================")
+
+    SESSION.auth = BasicAuthHeader(user, token)
+
+    # One pooled session shared by all workers – a single handshake per connection
+    with ThreadPoolExecutor(max_workers=min(8, len(execution_keys))) as ex:
+        results = list(ex.map(lambda k: fetch_execution(base_url, project_key, k, verify_ssl), execution_keys))
+
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(data_to_save, f, indent=2, ensure_ascii=False)
+    for data_to_save in results:
+        path = output_path_for(output_file, data_to_save["executionKey"], multiple)
+        write_json(data_to_save, path)
+        print(f"[INFO] Data saved successfully to {path}")
+        print(f"[INFO] Test cases fetched: {len(data_to_save['testCases'])}")
+
+    if multiple:
+        # The report, Confluence and email stages read RTM_OUTPUT_JSON: feed them the first key
+        write_json(results[0], output_file)
+        print(f"[INFO] {results[0]['executionKey']} also saved to {output_file} for the report stages")
 
-    print(f"[INFO] Data saved successfully to {output_file}")
-    print(f"[INFO] Test cases fetched: {len(test_cases)}")
     print("[INFO] fetch_rtm_data.py completed.")
     sys.exit(0)
 
@@ -4,115 +4,207 @@
 # Purpose: Build HTML + PDF report from RTM JSON export
 # ==========================================================
 
+import html
 import json
 import os
 import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
 try:
     from fpdf import FPDF
+    from fpdf.enums import XPos, YPos
 except ImportError:  # fpdf2 is optional
     FPDF = None
 
+try:
+    import ijson
+except ImportError:  # ijson is optional – fall back to a whole-file parse
+    ijson = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional – fall back to stdlib json
+    orjson = None
+
+GENERATED_AT_FORMAT = "%Y-%m-%d %H:%M:%S UTC"
+
+DEFAULT_PDF_MAX_ROWS = 5000
+
+# Reports with at least this many rows render the PDF in a worker process alongside the HTML
+PARALLEL_PDF_MIN_ROWS = 2000
+
+# Exports above this size are streamed with ijson; smaller ones are parsed in one go
+STREAM_MIN_BYTES = 32 * 1024 * 1024
+
+# Verbatim API payloads kept by fetch_rtm_data.py for debugging; the report never reads them
+SKIPPED_PREFIXES = ("raw", "testCases.item.raw", "issues.item.raw")
+
 
 def env(name, default=None):
     return os.getenv(name, default)
 
 
+def write_bytes_atomic(path: str, data: bytes):
+    """Write via a sibling temp file so readers never see a half-written report."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_lines_atomic(path: str, lines):
+    """Stream text into a sibling temp file and swap it in; a failed render leaves no temp file behind."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 def load_json(path: str):
     if not os.path.exists(path):
         print(f"[ERROR] JSON file not found: {path}", file=sys.stderr)
         sys.exit(4)
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    if ijson is not None and os.path.getsize(path) >= STREAM_MIN_BYTES:
+        with open(path, "rb") as f:
+            return stream_report_data(f)
+    with open(path, "rb") as f:
+        content = f.read()
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
 
 
-def build_html(data: dict) -> str:
-    test_cases = data.get("testCases", []) or data.get("issues", [])
-    execution_key = data.get("executionKey", "")
-    project_key = data.get("projectKey", "")
-    summary = data.get("summary", "")
-    status = data.get("status", "UNKNOWN")
-    fetched_at = data.get("fetchedAt", datetime.utcnow().isoformat(timespec="seconds") + "Z")
+def stream_report_data(f) -> dict:
+    """
+    Incrementally parse the export, never building the skipped "raw" subtrees.
+    They hold a second copy of every test case, so this roughly halves peak memory.
+    """
+    builder = ijson.ObjectBuilder()
+    skipping = None
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if skipping is not None:
+            if prefix == skipping or prefix.startswith(skipping + "."):
+                continue
+            skipping = None
+        if event == "map_key" and value == "raw":
+            child = f"{prefix}.raw" if prefix else "raw"
+            if child in SKIPPED_PREFIXES:
+                skipping = child
+                continue
+        builder.event(event, value)
+    return builder.value
 
-    rows_html = ""
-    for idx, tc in enumerate(test_cases, start=1):
-        rows_html += f"""
-            <tr>
-                <td>{idx}</td>
-                <td>{tc.get('key','')}</td>
-                <td>{tc.get('name','')}</td>
-                <td>{tc.get('status','')}</td>
-                <td>{tc.get('executedBy','')}</td>
-                <td>{tc.get('executedOn','')}</td>
-                <td>{', '.join(tc.get('defects', [])) if isinstance(tc.get('defects'), list) else tc.get('defects','')}</td>
-                <td>{tc.get('comment','')}</td>
-            </tr>
-        """
 
-    html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="utf-8" />
-    <title>RTM Test Execution Report - {execution_key}</title>
+_escape = lru_cache(maxsize=8192)(html.escape)
+
+
+def text_or_empty(value) -> str:
+    return "" if value is None else str(value)
+
+
+def cell(value) -> str:
+    """HTML-escaped cell text; statuses, users and dates repeat, so escapes are cached."""
+    return _escape(text_or_empty(value))
+
+
+def defects_text(defects) -> str:
+    if isinstance(defects, list):
+        return ", ".join(str(d) for d in defects)
+    return text_or_empty(defects)
+
+
+@dataclass(frozen=True)
+class Columns:
+    """Test case fields as parallel lists, normalised to str once for both renderers."""
+
+    keys: list
+    names: list
+    statuses: list
+    executed_by: list
+    executed_on: list
+    defects: list
+    comments: list
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_data(cls, data: dict):
+        test_cases = data.get("testCases", []) or data.get("issues", [])
+        columns = cls([], [], [], [], [], [], [])
+        for tc in test_cases:
+            columns.keys.append(text_or_empty(tc.get("key")))
+            columns.names.append(text_or_empty(tc.get("name")))
+            columns.statuses.append(text_or_empty(tc.get("status")))
+            columns.executed_by.append(text_or_empty(tc.get("executedBy")))
+            columns.executed_on.append(text_or_empty(tc.get("executedOn")))
+            columns.defects.append(defects_text(tc.get("defects")))
+            columns.comments.append(text_or_empty(tc.get("comment")))
+        return columns
+
+
+HTML_STYLE = """\
     <style>
-        body {{
+        body {
             font-family: Arial, sans-serif;
             margin: 24px;
             color: #222;
-        }}
-        h1, h2, h3 {{
+        }
+        h1, h2, h3 {
             color: #1a4f8b;
-        }}
-        .meta {{
+        }
+        .meta {
             margin-bottom: 16px;
-        }}
-        .meta dt {{
+        }
+        .meta dt {
             font-weight: bold;
             float: left;
             width: 160px;
-        }}
-        .meta dd {{
+        }
+        .meta dd {
             margin: 0 0 6px 170px;
-        }}
-        table {{
+        }
+        table {
             border-collapse: collapse;
             width: 100%;
             margin-top: 18px;
-        }}
-        th, td {{
+        }
+        th, td {
             border: 1px solid #ccc;
             padding: 6px 8px;
             font-size: 12px;
-        }}
-        th {{
+        }
+        th {
             background: #f4f7fb;
             text-align: left;
-        }}
-        .status-PASSED {{ background-color: #e6ffed; }}
-        .status-FAILED {{ background-color: #ffe6e6; }}
-        .status-BLOCKED {{ background-color: #fff6e6; }}
-        .footer {{
+        }
+        .status-PASSED { background-color: #e6ffed; }
+        .status-FAILED { background-color: #ffe6e6; }
+        .status-BLOCKED { background-color: #fff6e6; }
+        .footer {
             margin-top: 32px;
             font-size: 11px;
             color: #777;
-        }}
+        }
     </style>
-</head>
-<body>
-    <h1>RTM Test Execution Report</h1>
-    <h2>{project_key} / {execution_key}</h2>
-
-    <dl class="meta">
-        <dt>Summary:</dt><dd>{summary}</dd>
-        <dt>Status:</dt><dd>{status}</dd>
-        <dt>Project:</dt><dd>{project_key}</dd>
-        <dt>Execution:</dt><dd>{execution_key}</dd>
-        <dt>Generated at:</dt><dd>{fetched_at}</dd>
-        <dt>Total Test Cases:</dt><dd>{len(test_cases)}</dd>
-    </dl>
+"""
 
+HTML_TABLE_HEAD = """
     <h3>Test Case Executions</h3>
     <table>
         <thead>
@@ -128,25 +220,120 @@ def build_html(data: dict) -> str:
             </tr>
         </thead>
         <tbody>
-            {rows_html}
+"""
+
+HTML_TABLE_TAIL = """\
         </tbody>
     </table>
+"""
+
 
+def build_html(data: dict, columns: Columns, generated_at: datetime):
+    """Yield the report in chunks: static markup is module-level, rows are generated lazily."""
+    execution_key = cell(data.get("executionKey", ""))
+    project_key = cell(data.get("projectKey", ""))
+    summary = cell(data.get("summary", ""))
+    status = cell(data.get("status", "UNKNOWN"))
+    fetched_at = cell(data.get("fetchedAt")) or generated_at.isoformat(timespec="seconds") + "Z"
+
+    yield f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8" />
+    <title>RTM Test Execution Report - {execution_key}</title>
+"""
+    yield HTML_STYLE
+    yield f"""</head>
+<body>
+    <h1>RTM Test Execution Report</h1>
+    <h2>{project_key} / {execution_key}</h2>
+
+    <dl class="meta">
+        <dt>Summary:</dt><dd>{summary}</dd>
+        <dt>Status:</dt><dd>{status}</dd>
+        <dt>Project:</dt><dd>{project_key}</dd>
+        <dt>Execution:</dt><dd>{execution_key}</dd>
+        <dt>Generated at:</dt><dd>{fetched_at}</dd>
+        <dt>Total Test Cases:</dt><dd>{len(columns)}</dd>
+    </dl>
+"""
+    yield HTML_TABLE_HEAD
+
+    esc = _escape
+    for idx, key, name, status_, by, on, defects, comment in zip(
+        range(1, len(columns) + 1),
+        columns.keys,
+        columns.names,
+        columns.statuses,
+        columns.executed_by,
+        columns.executed_on,
+        columns.defects,
+        columns.comments,
+    ):
+        yield (
+            f"<tr><td>{idx}</td><td>{esc(key)}</td><td>{esc(name)}</td><td>{esc(status_)}</td>"
+            f"<td>{esc(by)}</td><td>{esc(on)}</td><td>{esc(defects)}</td><td>{esc(comment)}</td></tr>\n"
+        )
+
+    yield HTML_TABLE_TAIL
+    yield f"""
     <div class="footer">
-        Generated by RTM Jenkins Pipeline on {datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")}
+        Generated by RTM Jenkins Pipeline on {generated_at.strftime(GENERATED_AT_FORMAT)}
     </div>
 </body>
 </html>
 """
-    return html
 
 
-def build_pdf(data: dict, pdf_path: str):
+# Fixed A4 table layout: 186 mm fits inside the 190 mm printable width, so no rescale is needed
+PDF_HEADERS = ("#", "Key", "Summary", "Status", "Exec By", "Exec On")
+PDF_COL_WIDTHS = (8, 20, 80, 18, 25, 35)
+
+PDF_CELL_PADDING = 1  # mm, FPDF's default horizontal cell margin (c_margin)
+ELLIPSIS = "..."
+
+
+@lru_cache(maxsize=16384)
+def latin1(text: str) -> str:
+    """Core PDF fonts only cover Latin-1; replace anything else with '?' instead of failing."""
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def string_width_cache(pdf):
+    """
+    pdf.get_string_width memoised on (font, text) – status names, users and dates repeat
+    on every page. The cache lives in this closure, so it is freed with the document.
+    """
+    @lru_cache(maxsize=65536)
+    def width(font_key, text: str) -> float:
+        return pdf.get_string_width(text)
+
+    return width
+
+
+def fit_cell_text(pdf, measure, text: str, width: float) -> str:
+    """Clip text to the column width in one pass, measuring instead of counting characters."""
+    text = latin1(text)
+    font_key = (pdf.font_family, pdf.font_style, pdf.font_size_pt)
+    available = width - 2 * PDF_CELL_PADDING
+    if measure(font_key, text) <= available:
+        return text
+    available -= measure(font_key, ELLIPSIS)
+    lo, hi = 0, len(text)
+    while lo < hi:  # longest prefix that still fits; one-off prefixes bypass the cache
+        mid = (lo + hi + 1) // 2
+        if pdf.get_string_width(text[:mid]) <= available:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + ELLIPSIS
+
+
+def build_pdf(data: dict, columns: Columns, pdf_path: str, generated_at: datetime, max_rows: int = 0):
     if FPDF is None:
         print("[WARN] fpdf2 is not installed – skipping PDF generation.")
         return
 
-    test_cases = data.get("testCases", []) or data.get("issues", [])
     execution_key = data.get("executionKey", "")
     project_key = data.get("projectKey", "")
     status = data.get("status", "UNKNOWN")
@@ -154,40 +341,56 @@ def build_pdf(data: dict, pdf_path: str):
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
-    pdf.set_font("Arial", "B", 14)
-    pdf.cell(0, 10, f"RTM Test Execution Report: {project_key} / {execution_key}", ln=True)
-    pdf.set_font("Arial", "", 11)
-    pdf.cell(0, 8, f"Overall Status: {status}", ln=True)
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.cell(0, 10, latin1(f"RTM Test Execution Report: {project_key} / {execution_key}"), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.set_font("Helvetica", "", 11)
+    pdf.cell(0, 8, latin1(f"Overall Status: {status}"), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.cell(0, 8, f"Generated: {generated_at.strftime(GENERATED_AT_FORMAT)}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
     pdf.ln(4)
 
-    # Table header
-    pdf.set_font("Arial", "B", 9)
-    headers = ["#", "Key", "Summary", "Status", "Exec By", "Exec On"]
-    col_widths = [8, 20, 80, 18, 25, 35]
+    if max_rows and len(columns) > max_rows:
+        # Summary-only PDF: rendering every row would dominate run time and memory
+        print(f"[WARN] {len(columns)} test cases exceed RTM_PDF_MAX_ROWS={max_rows} – PDF contains the summary only.")
+        pdf.cell(0, 8, f"Total Test Cases: {len(columns)}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        for name, count in Counter(columns.statuses).most_common():
+            pdf.cell(0, 6, latin1(f"{name or 'UNKNOWN'}: {count}"), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(4)
+        pdf.cell(0, 8, "Full details in the HTML report.", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        write_bytes_atomic(pdf_path, pdf.output())
+        print(f"[INFO] PDF summary written to {pdf_path}")
+        return
 
-    for header, width in zip(headers, col_widths):
+    # Table header
+    pdf.set_font("Helvetica", "B", 9)
+    col_widths = PDF_COL_WIDTHS
+    for header, width in zip(PDF_HEADERS, col_widths):
         pdf.cell(width, 7, header, border=1)
     pdf.ln()
 
     # Rows
-    pdf.set_font("Arial", "", 8)
-    for idx, tc in enumerate(test_cases, start=1):
-        row = [
-            str(idx),
-            (tc.get("key") or "")[:15],
-            (tc.get("name") or "")[:60],
-            (tc.get("status") or "")[:10],
-            (tc.get("executedBy") or "")[:18],
-            (tc.get("executedOn") or "")[:20],
-        ]
-        for text, width in zip(row, col_widths):
-            pdf.cell(width, 6, text, border=1)
+    pdf.set_font("Helvetica", "", 8)
+    measure = string_width_cache(pdf)
+    rows = zip(columns.keys, columns.names, columns.statuses, columns.executed_by, columns.executed_on)
+    for idx, row in enumerate(rows, start=1):
+        pdf.cell(col_widths[0], 6, str(idx), border=1)
+        for text, width in zip(row, col_widths[1:]):
+            pdf.cell(width, 6, fit_cell_text(pdf, measure, text, width), border=1)
         pdf.ln()
 
-    pdf.output(pdf_path)
+    write_bytes_atomic(pdf_path, pdf.output())
     print(f"[INFO] PDF report written to {pdf_path}")
 
 
+def pdf_max_rows() -> int:
+    """RTM_PDF_MAX_ROWS caps the PDF table (default 5000); 0 renders every row."""
+    raw = env("RTM_PDF_MAX_ROWS") or str(DEFAULT_PDF_MAX_ROWS)
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        print(f"[WARN] Invalid RTM_PDF_MAX_ROWS={raw!r} – using {DEFAULT_PDF_MAX_ROWS}.")
+        return DEFAULT_PDF_MAX_ROWS
+
+
 def main():
     json_path = env("RTM_OUTPUT_JSON") or "data/rtm_execution.json"
     html_path = env("RTM_REPORT_HTML") or "report/rtm_execution.html"
@@ -196,15 +399,33 @@ def main():
     print(f"[INFO] Loading RTM JSON from {json_path}")
     data = load_json(json_path)
 
-    html = build_html(data)
+    columns = Columns.from_data(data)
+    max_pdf_rows = pdf_max_rows()
+    generated_at = datetime.utcnow()  # one timestamp shared by the HTML and PDF outputs
     Path(os.path.dirname(html_path)).mkdir(parents=True, exist_ok=True)
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(html)
-    print(f"[INFO] HTML report written to {html_path}")
-
-    # Generate PDF as well
     Path(os.path.dirname(pdf_path)).mkdir(parents=True, exist_ok=True)
-    build_pdf(data, pdf_path)
+
+    # Both renderers are CPU-bound and independent; for large reports overlap them.
+    # Only the header fields and the columns are pickled to the worker, not the full export.
+    pdf_future = None
+    pool = None
+    full_pdf = not max_pdf_rows or len(columns) <= max_pdf_rows
+    if FPDF is not None and full_pdf and len(columns) >= PARALLEL_PDF_MIN_ROWS:
+        pool = ProcessPoolExecutor(max_workers=1)
+        header = {k: data.get(k) for k in ("executionKey", "projectKey", "status") if k in data}
+        pdf_future = pool.submit(build_pdf, header, columns, pdf_path, generated_at, max_pdf_rows)
+
+    try:
+        write_lines_atomic(html_path, build_html(data, columns, generated_at))
+        print(f"[INFO] HTML report written to {html_path}")
+
+        if pdf_future is not None:
+            pdf_future.result()  # surfaces any worker exception here
+        else:
+            build_pdf(data, columns, pdf_path, generated_at, max_pdf_rows)
+    finally:
+        if pool is not None:
+            pool.shutdown()
     print("[INFO] generate_rtm_report.py completed.")
     sys.exit(0)
 
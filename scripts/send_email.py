@@ -5,18 +5,44 @@
 #          (HTML body + HTML/PDF attachments)
 # ==========================================================
 
+import base64
 import json
+import mimetypes
+import mmap
 import os
+import random
 import smtplib
+import socket
+import ssl
 import sys
+import time
 import traceback
-from email.header import Header
-from email.mime.application import MIMEApplication
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+from concurrent.futures import ThreadPoolExecutor
+from email import policy
+from email.message import EmailMessage, MIMEPart
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 
+try:
+    import orjson
+except ImportError:  # orjson is optional – fall back to stdlib json
+    orjson = None
+
+
+# Built once: the CA bundle is loaded a single time and shared by every (re)connect
+TLS_CONTEXT = ssl.create_default_context()
+TLS_CONTEXT.minimum_version = ssl.TLSVersion.TLSv1_2
+
+
+SMTPS_PORT = 465
+
+
+@lru_cache(maxsize=1)
+def local_hostname() -> str:
+    """EHLO name, resolved once – smtplib would otherwise call getfqdn() on every connect."""
+    return socket.getfqdn()
+
 
 def env(name, default=None, required=False):
     value = os.getenv(name, default)
@@ -26,53 +52,239 @@ def env(name, default=None, required=False):
     return value
 
 
-def parse_recipients(raw: str) -> List[str]:
-    if not raw:
-        return []
-    parts = [p.strip() for p in raw.replace(";", ",").split(",")]
-    return [p for p in parts if p]
+def int_env(name: str, default: int) -> int:
+    """Positive integer setting; an unparsable value falls back to the default with a warning."""
+    raw = os.getenv(name) or str(default)
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        print(f"[WARN] Invalid {name}={raw!r} – using {default}.")
+        return default
+
+
+def parse_recipients(*raws: str) -> List[str]:
+    """Split comma/semicolon lists into one ordered, de-duplicated address list."""
+    seen = {}
+    for raw in raws:
+        if not raw:
+            continue
+        for part in raw.replace(";", ",").split(","):
+            part = part.strip()
+            if part:
+                seen.setdefault(part, None)
+    return list(seen)
+
+
+def shard_recipients(recipients: List[str], size: int) -> List[List[str]]:
+    return [recipients[i:i + size] for i in range(0, len(recipients), size)]
 
 
 def load_execution_summary(json_path: str):
     if not os.path.exists(json_path):
         return {}
     try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(json_path, "rb") as f:
+            content = f.read()
+        return orjson.loads(content) if orjson is not None else json.loads(content)
     except Exception:
         return {}
 
 
-def build_message(subject: str, sender: str, to_addrs: List[str], html_body: str):
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = Header(subject, "utf-8")
+def build_message(subject: str, sender: str, to_addrs: List[str], html_body: str) -> EmailMessage:
+    msg = EmailMessage(policy=policy.SMTP)  # CRLF line endings generated natively
+    msg["Subject"] = subject  # RFC 2047-encoded by the policy when non-ASCII
     msg["From"] = sender
     msg["To"] = ", ".join(to_addrs)
 
-    msg.attach(MIMEText(html_body, "html", "utf-8"))
+    msg.set_content(html_body, subtype="html", cte="quoted-printable")  # 7-bit safe for any relay
     return msg
 
 
-def attach_file(msg: MIMEMultipart, path: str, filename: str = None):
-    if not path or not os.path.exists(path):
-        print(f"[WARN] Attachment missing or path not found: {path}")
+# 57 input bytes encode to one 76-character MIME line, so chunk boundaries never split a line
+BASE64_CHUNK = 57 * 1024
+
+
+def encode_file_base64(path: str) -> str:
+    """Base64 (MIME line-wrapped) from an mmap of the file – the raw bytes never land on the Python heap."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return "".join(
+                base64.encodebytes(mm[i:i + BASE64_CHUNK]).decode("ascii")
+                for i in range(0, len(mm), BASE64_CHUNK)
+            )
+
+
+def attach_files(msg: EmailMessage, paths: List[str]):
+    """Read and encode the files concurrently (I/O overlaps on slow workspaces), attach in order."""
+    present = []
+    for path in paths:
+        if not path or not os.path.exists(path):
+            print(f"[WARN] Attachment missing or path not found: {path}")
+        else:
+            present.append(path)
+    if not present:
         return
+    with ThreadPoolExecutor(max_workers=len(present)) as ex:
+        payloads = list(ex.map(encode_file_base64, present))
+    for path, payload in zip(present, payloads):
+        attach_file(msg, path, payload)
+
+
+def attach_file(msg: EmailMessage, path: str, payload: str, filename: str = None):
     filename = filename or os.path.basename(path)
-    with open(path, "rb") as f:
-        part = MIMEApplication(f.read(), Name=filename)
-    part["Content-Disposition"] = f'attachment; filename="{filename}"'
+    part = MIMEPart(policy=msg.policy)
+    part["Content-Type"] = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    part["Content-Disposition"] = "attachment"
+    part.set_param("filename", filename, header="Content-Disposition")
+    part["Content-Transfer-Encoding"] = "base64"
+    part.set_payload(payload)
+    if not msg.is_multipart():
+        msg.make_mixed()
     msg.attach(part)
     print(f"[INFO] Attached file: {filename}")
 
 
-def build_html_body(data: dict) -> str:
-    project = data.get("projectKey", "")
-    execution = data.get("executionKey", "")
-    status = data.get("status", "UNKNOWN")
-    summary = data.get("summary", "")
-    fetched_at = data.get("fetchedAt", "")
-    total_tc = len(data.get("testCases", []) or data.get("issues", []))
+class SmtpSession:
+    """
+    One connected, authenticated SMTP connection shared by every send in a run.
+    The connection is opened on first use; before it is reused it is probed with
+    NOOP and re-established once if the server has dropped it.
+    """
 
+    def __init__(self, host: str, port: int, user: str, password: str, use_tls: bool, timeout: int = 30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.server = None
+        self.sends = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def connect(self):
+        if self.port == SMTPS_PORT:  # implicit TLS – STARTTLS does not apply
+            server = smtplib.SMTP_SSL(
+                self.host, self.port, local_hostname=local_hostname(), timeout=self.timeout, context=TLS_CONTEXT
+            )
+        else:
+            server = smtplib.SMTP(self.host, self.port, local_hostname=local_hostname(), timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.use_tls and self.port != SMTPS_PORT:
+                if not server.has_extn("starttls"):
+                    raise smtplib.SMTPNotSupportedError(
+                        f"{self.host}:{self.port} does not offer STARTTLS – "
+                        f"use port {SMTPS_PORT} for implicit TLS or set SMTP_USE_TLS=false"
+                    )
+                server.starttls(context=TLS_CONTEXT)
+                server.ehlo()
+            server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+
+    def close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+        self.server = None
+
+    def ensure_connected(self):
+        try:
+            alive = self.server is not None and self.server.noop()[0] == 250
+        except (smtplib.SMTPServerDisconnected, OSError):
+            alive = False
+        if not alive:
+            print("[WARN] SMTP connection lost – reconnecting.")
+            self.close()
+            self.connect()
+
+    def send(self, sender: str, recipients: List[str], message):
+        if self.server is None:
+            self.connect()
+        elif self.sends:
+            self.ensure_connected()
+        refused = self.server.sendmail(sender, recipients, message)
+        self.sends += 1
+        return refused
+
+
+def is_recoverable(error: Exception) -> bool:
+    """Transient failures (dropped connection, 4xx replies) are retried; bad credentials and 5xx are not."""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPException):  # e.g. missing STARTTLS/AUTH support
+        return False
+    return isinstance(error, OSError)  # timeouts, resets, DNS hiccups
+
+
+def error_reply(error: Exception):
+    """(code, reply) for recipients lost to an exception, shaped like sendmail()'s refused entries."""
+    reply = getattr(error, "smtp_error", None) or str(error)
+    return getattr(error, "smtp_code", 0), reply if isinstance(reply, bytes) else reply.encode()
+
+
+def send_with_retry(session: SmtpSession, sender: str, recipients: List[str], message,
+                    retries: int = 3, base_delay: float = 1.0, max_delay: float = 30.0):
+    """
+    Send through the session, retrying transient failures with exponential backoff and
+    full jitter so agents hit by the same outage do not retry in lockstep.
+    Addresses the server accepted are never sent to again: after a partial delivery only
+    the temporarily refused (4xx) recipients are retried.
+    Returns {recipient: (code, reply)} for the recipients that were finally refused; once
+    any copy has been delivered, later failures are reported there instead of raised.
+    """
+    pending = list(recipients)
+    failed = {}
+    delivered = False
+    for attempt in range(1, retries + 1):
+        try:
+            refused = session.send(sender, pending, message)
+            delivered = True
+            error = None
+        except smtplib.SMTPRecipientsRefused as e:  # every pending recipient was refused
+            refused, error = e.recipients, e
+        except Exception as e:
+            if attempt == retries or not is_recoverable(e):
+                if not delivered:
+                    raise
+                failed.update((r, error_reply(e)) for r in pending)
+                return failed
+            refused, error = None, e
+
+        if refused is not None:
+            temporary = {r for r, (code, _) in refused.items() if 400 <= code < 500}
+            failed.update((r, reply) for r, reply in refused.items() if r not in temporary)
+            if not temporary or attempt == retries:
+                if not delivered:
+                    raise error
+                failed.update(refused)
+                return failed
+            pending = [r for r in pending if r in temporary]
+            error = error or f"{len(pending)} recipient(s) temporarily refused"
+        else:
+            session.close()  # next attempt starts from a fresh connection
+
+        delay = min(max_delay, random.uniform(0, base_delay * 2 ** (attempt - 1)))
+        print(f"[WARN] Send attempt {attempt}/{retries} failed: {error} – retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def build_html_body(project: str, execution: str, status: str, summary: str, fetched_at: str, total_tc: int) -> str:
     return f"""
     <html>
       <body style="font-family: Arial, sans-serif; font-size: 13px;">
@@ -104,6 +316,8 @@ def main():
     smtp_user = env("SMTP_USER", required=True)
     smtp_password = env("SMTP_PASSWORD", required=True)
     smtp_use_tls = os.getenv("SMTP_USE_TLS", "true").lower() not in ("false", "0", "no")
+    smtp_retries = int_env("SMTP_RETRIES", 3)
+    max_recipients = int_env("SMTP_MAX_RECIPIENTS", 50)  # per-message RCPT limit
 
     sender = env("EMAIL_FROM", required=True)
     to_raw = env("EMAIL_TO", required=True)
@@ -122,26 +336,40 @@ def main():
     json_path = os.getenv("RTM_OUTPUT_JSON", "data/rtm_execution.json")
     data = load_execution_summary(json_path)
 
+    # Read each field once; the subject and the summary body share them
     project = data.get("projectKey", "")
     execution = data.get("executionKey", "")
     status = data.get("status", "UNKNOWN")
+    total_tc = len(data.get("testCases") or data.get("issues") or ())
 
     subject = os.getenv(
         "EMAIL_SUBJECT",
         f"RTM Test Execution Report - {project}/{execution} [{status}]",
     )
 
-    html_body = build_html_body(data)
+    html_report = os.getenv("RTM_REPORT_HTML", "report/rtm_execution.html")
+    pdf_report = os.getenv("RTM_REPORT_PDF", "report/rtm_execution.pdf")
+    inline_html = os.getenv("EMAIL_INLINE_HTML_ONLY", "false").lower() in ("true", "1", "yes")
+
+    if inline_html and os.path.exists(html_report):
+        # The full report becomes the body, so it is not sent a second time as an attachment
+        with open(html_report, "r", encoding="utf-8") as f:
+            html_body = f.read()
+        print(f"[INFO] Inlining {html_report} as the message body")
+    else:
+        html_body = build_html_body(
+            project, execution, status, data.get("summary", ""), data.get("fetchedAt", ""), total_tc
+        )
+        inline_html = False
     msg = build_message(subject, sender, to_list + cc_list, html_body)
 
     # Attach HTML + PDF
-    html_report = os.getenv("RTM_REPORT_HTML", "report/rtm_execution.html")
-    pdf_report = os.getenv("RTM_REPORT_PDF", "report/rtm_execution.pdf")
+    attach_files(msg, [pdf_report] if inline_html else [html_report, pdf_report])
 
-    attach_file(msg, html_report)
-    attach_file(msg, pdf_report)
+    all_recipients = parse_recipients(to_raw, cc_raw, bcc_raw)
 
-    all_recipients = list(dict.fromkeys(to_list + cc_list + bcc_list))  # dedupe
+    # Serialised once; every shard and retry resends these bytes
+    payload = msg.as_bytes()
 
     print("=======================================================")
     print("[INFO] Sending email notification")
@@ -155,17 +383,34 @@ def main():
     print("=======================================================")
 
     try:
-        with smtplib.SMTP(smtp_host, smtp_port, timeout=30) as server:
-            server.ehlo()
-            if smtp_use_tls:
-                server.starttls()
-                server.ehlo()
-            server.login(smtp_user, smtp_password)
-            server.sendmail(sender, all_recipients, msg.as_string())
-            print("[INFO] Email sent successfully.")
+        with SmtpSession(smtp_host, smtp_port, smtp_user, smtp_password, smtp_use_tls) as session:
+            shards = shard_recipients(all_recipients, max_recipients)
+            refused = {}
+            failed_batches = 0
+            for number, shard in enumerate(shards, start=1):
+                try:
+                    refused.update(send_with_retry(session, sender, shard, payload, retries=smtp_retries))
+                except (smtplib.SMTPException, OSError) as e:
+                    # One bad batch must not cost the remaining batches their copy
+                    failed_batches += 1
+                    print(f"[ERROR] Batch {number}/{len(shards)} not sent: {e}", file=sys.stderr)
+                    if isinstance(e, smtplib.SMTPRecipientsRefused):
+                        refused.update(e.recipients)
+                    else:
+                        refused.update((rcpt, error_reply(e)) for rcpt in shard)
+                    continue
+                if len(shards) > 1:
+                    print(f"[INFO] Sent batch {number}/{len(shards)} ({len(shard)} recipients)")
+            for rcpt, (code, reply) in refused.items():
+                print(f"[WARN] Not delivered to {rcpt}: {code} {reply.decode(errors='replace')}")
+        if failed_batches:
+            print(f"[ERROR] {failed_batches} of {len(shards)} batch(es) could not be sent.", file=sys.stderr)
+            sys.exit(6)
+        print("[INFO] Email sent successfully.")
     except Exception as e:
         print(f"[ERROR] Failed to send email: {e}", file=sys.stderr)
-        traceback.print_exc()
+        if not isinstance(e, (smtplib.SMTPException, OSError)):
+            traceback.print_exc()  # SMTP/socket errors are fully described by the message above
         sys.exit(6)
 
     sys.exit(0)